@@ -1,19 +1,26 @@
 # app.py
 import numpy as np  # add this
 import os
+import threading
 import time
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from apscheduler.schedulers.background import BackgroundScheduler
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker, scoped_session
 
 from models import Base, Snapshot
@@ -43,11 +50,48 @@ log = logging.getLogger("marketstack")
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///market.db")
 engine = create_engine(DB_URL, future=True)
 Base.metadata.create_all(engine)
+
+def ensure_unique_index():
+    """Back-fill the (symbol, timeframe, ts) unique index on pre-existing DBs.
+
+    create_all never alters tables that already exist, but persist_snapshots'
+    ON CONFLICT targets this index. De-duplicate any rows inserted before the
+    constraint existed, then create the index idempotently (the statement works
+    on both SQLite and Postgres).
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "DELETE FROM snapshots WHERE id NOT IN ("
+            "SELECT MIN(id) FROM snapshots GROUP BY symbol, timeframe, ts)"
+        ))
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_symbol_tf_ts "
+            "ON snapshots (symbol, timeframe, ts)"
+        ))
+
+ensure_unique_index()
 SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False))
 
 # ---------------- Cache ----------------
-CACHE: Dict[str, List[Dict[str, Any]]] = {}
+# Bars are stored column-wise (SoA): one float64 ndarray per OHLCV field plus a
+# datetime64[ns] UTC ts array, so indicator runs and REST hits never rebuild
+# frames from per-row dicts. The dict itself is LRU-ordered and capped at
+# MAX_CACHE_KEYS (symbol, tf) entries so memory stays bounded if the symbol
+# list grows.
+BAR_COLUMNS = ("open", "high", "low", "close", "volume")
+CACHE: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
 MAX_CACHE_BARS = 1200  # keep enough for higher TFs
+MAX_CACHE_KEYS = int(os.getenv("MAX_CACHE_KEYS", "64"))
+
+def _cache_get(key: str) -> Optional[Dict[str, np.ndarray]]:
+    cols = CACHE.get(key)
+    if cols is not None:
+        CACHE.move_to_end(key)
+    return cols
+
+# Memoized (df_ind, signal) per (symbol, tf, last bar ts, bar count), LRU-evicted.
+IND_CACHE: "OrderedDict[Tuple[str, str, str, int], Tuple[pd.DataFrame, Dict[str, Any]]]" = OrderedDict()
+IND_CACHE_SIZE = 64
 
 # ---------------- Helpers ----------------
 def timeframe_minutes(tf: str) -> int:
@@ -57,11 +101,33 @@ def timeframe_minutes(tf: str) -> int:
         return int(tf.replace("hour", "")) * 60
     raise ValueError(f"Unsupported timeframe: {tf}")
 
+# Hoisted resample constants: the offset strings ("T" alias is deprecated in
+# favor of "min") and aggregator dict would otherwise be rebuilt per call.
+_OFFSET = {tf: f"{timeframe_minutes(tf)}min" for tf in TIMEFRAMES}
+_AGG = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+}
+
 def pandas_offset(tf: str) -> str:
-    return f"{timeframe_minutes(tf)}T"
+    offset = _OFFSET.get(tf)
+    return offset if offset is not None else f"{timeframe_minutes(tf)}min"
+
+# Pooled keep-alive session so polling doesn't pay a TCP+TLS handshake per fetch.
+# Retries stay with the manual backoff loop below (Retry(total=0) disables urllib3's).
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(total=0)))
 
-def marketstack_intraday_api(symbol: str, interval: str, limit: int) -> pd.DataFrame:
-    """Fetch from Marketstack Intraday API for a given interval. Return empty df on failure."""
+def marketstack_intraday_api(symbol: str, interval: str, limit: int) -> Optional[pd.DataFrame]:
+    """Fetch from Marketstack Intraday API for a given interval.
+
+    Returns an empty df when the API answers successfully with no data, and
+    None when every attempt failed in transport — callers can tell "the tier
+    doesn't serve this interval" apart from a transient outage.
+    """
     url = "https://api.marketstack.com/v1/intraday"
     params = {
         "access_key": API_KEY,
@@ -72,7 +138,7 @@ def marketstack_intraday_api(symbol: str, interval: str, limit: int) -> pd.DataF
     }
     for attempt in range(4):
         try:
-            resp = requests.get(url, params=params, timeout=12)
+            resp = _HTTP.get(url, params=params, timeout=12)
             resp.raise_for_status()
             data = resp.json()
             rows = data.get("data", [])
@@ -90,104 +156,126 @@ def marketstack_intraday_api(symbol: str, interval: str, limit: int) -> pd.DataF
             wait = 2 ** attempt
             log.warning(f"[{symbol} {interval}] API error: {e} (retry {attempt+1}/4 in {wait}s)")
             time.sleep(wait)
-    return pd.DataFrame()
+    return None
 
 def resample_ohlcv(df_1m: pd.DataFrame, tf: str) -> pd.DataFrame:
     """Resample 1-minute OHLCV to target timeframe."""
     if df_1m.empty:
         return df_1m
-    df = df_1m.copy()
-    df.set_index("ts", inplace=True)
-    agg = {
-        "open": "first",
-        "high": "max",
-        "low": "min",
-        "close": "last",
-        "volume": "sum",
-    }
-    out = df.resample(pandas_offset(tf)).agg(agg).dropna().reset_index()
+    # set_index (non-inplace) already yields a fresh frame; no copy needed.
+    # Default left label/closed: bars are stamped at their open time, matching
+    # the direct API fetches so a series never mixes stamp conventions when
+    # the fallback kicks in.
+    out = (
+        df_1m.set_index("ts")
+        .resample(pandas_offset(tf))
+        .agg(_AGG)
+        .dropna()
+        .reset_index()
+    )
     return out
 
-def marketstack_intraday(symbol: str, interval: str, limit: int) -> pd.DataFrame:
-    """
-    Try to fetch the exact interval. If empty (unsupported tier or interval),
-    fall back to 1min and resample.
-    """
-    df = marketstack_intraday_api(symbol, interval, limit)
-    if not df.empty:
-        return df
-
-    # Fallback: derive from 1min
-    factor = max(1, timeframe_minutes(interval))
-    # Pull enough 1min bars to produce 'limit' bars at the target TF
-    base_limit = min(5000, limit * factor)  # cap to be safe
-    df1 = marketstack_intraday_api(symbol, "1min", base_limit)
-    if df1.empty:
-        return df1
-    out = resample_ohlcv(df1, interval)
-    return out.tail(limit)
-
 def cache_key(symbol: str, tf: str) -> str:
     return f"{symbol}_{tf}"
 
 def upsert_cache(key: str, df: pd.DataFrame):
     if df.empty:
         return
-    arr = CACHE.setdefault(key, [])
-    for _, r in df.iterrows():
-        bar = {
-            "ts": r["ts"].isoformat() if isinstance(r["ts"], pd.Timestamp) else pd.to_datetime(r["ts"], utc=True).isoformat(),
-            "open": float(r["open"]),
-            "high": float(r["high"]),
-            "low": float(r["low"]),
-            "close": float(r["close"]),
-            "volume": float(r.get("volume") or 0.0),
+    ts = pd.to_datetime(df["ts"], utc=True).to_numpy(dtype="datetime64[ns]")
+    if "volume" in df.columns:
+        volume = df["volume"].fillna(0.0).to_numpy(dtype="float64")
+    else:
+        volume = np.zeros(len(df))
+    new = {
+        "ts": ts,
+        "open": df["open"].to_numpy(dtype="float64"),
+        "high": df["high"].to_numpy(dtype="float64"),
+        "low": df["low"].to_numpy(dtype="float64"),
+        "close": df["close"].to_numpy(dtype="float64"),
+        "volume": volume,
+    }
+    cur = _cache_get(key)
+    if cur is None or cur["ts"].size == 0:
+        CACHE[key] = {k: v[-MAX_CACHE_BARS:] for k, v in new.items()}
+    else:
+        # Bars arrive sorted ASC; skip everything at or before the last cached ts.
+        cut = int(np.searchsorted(ts, cur["ts"][-1], side="right"))
+        if cut >= ts.size:
+            return
+        CACHE[key] = {
+            k: np.concatenate([cur[k], new[k][cut:]])[-MAX_CACHE_BARS:] for k in new
         }
-        if not arr or arr[-1]["ts"] != bar["ts"]:
-            arr.append(bar)
-            if len(arr) > MAX_CACHE_BARS:
-                del arr[0 : len(arr) - MAX_CACHE_BARS]
+    CACHE.move_to_end(key)
+    while len(CACHE) > MAX_CACHE_KEYS:
+        CACHE.popitem(last=False)
+
+def cache_bars(key: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Materialize cached bars as row dicts (JSON shape) for the REST API."""
+    cols = _cache_get(key)
+    if not cols or cols["ts"].size == 0:
+        return []
+    sl = slice(-limit, None) if limit else slice(None)
+    ts_iso = pd.DatetimeIndex(cols["ts"][sl], tz=timezone.utc).map(pd.Timestamp.isoformat)
+    return pd.DataFrame(
+        {"ts": ts_iso, **{c: cols[c][sl] for c in BAR_COLUMNS}}
+    ).to_dict(orient="records")
 
 def persist_snapshots(symbol: str, tf: str, df: pd.DataFrame):
     if df.empty:
         return
+    rows = pd.DataFrame(
+        {
+            "symbol": symbol,
+            "timeframe": tf,
+            "ts": pd.to_datetime(df["ts"], utc=True),
+            "open": df["open"].astype("float64"),
+            "high": df["high"].astype("float64"),
+            "low": df["low"].astype("float64"),
+            "close": df["close"].astype("float64"),
+            "volume": df["volume"].fillna(0.0).astype("float64") if "volume" in df.columns else 0.0,
+        }
+    ).to_dict(orient="records")
+    dialect_insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    stmt = dialect_insert(Snapshot).on_conflict_do_nothing(
+        index_elements=["symbol", "timeframe", "ts"]
+    )
     session = SessionLocal()
     try:
-        for _, r in df.iterrows():
-            ts = r["ts"].to_pydatetime() if isinstance(r["ts"], pd.Timestamp) else pd.to_datetime(r["ts"], utc=True).to_pydatetime()
-            exists = (
-                session.query(Snapshot)
-                .filter(Snapshot.symbol == symbol, Snapshot.timeframe == tf, Snapshot.ts == ts)
-                .first()
-            )
-            if exists:
-                continue
-            snap = Snapshot(
-                symbol=symbol,
-                timeframe=tf,
-                ts=ts,
-                open=float(r["open"]),
-                high=float(r["high"]),
-                low=float(r["low"]),
-                close=float(r["close"]),
-                volume=float(r.get("volume") or 0.0),
-            )
-            session.add(snap)
+        # executemany form: one prepared statement, rows sent as parameter batches
+        session.execute(stmt, rows)
         session.commit()
     finally:
         session.close()
 
-def compute_and_emit(symbol: str, tf: str):
+def get_indicators_cached(symbol: str, tf: str):
+    """Return (df_ind, signal) for the cached bars, memoized until a new bar lands."""
     key = cache_key(symbol, tf)
-    bars = CACHE.get(key, [])
+    cols = _cache_get(key)
+    n = cols["ts"].size if cols else 0
     # Need enough bars for indicators (e.g., 50+)
-    if len(bars) < 60:
-        return
-    df = pd.DataFrame(bars)
-    df["ts"] = pd.to_datetime(df["ts"], utc=True)
-    df.set_index("ts", inplace=True)
+    if n < 60:
+        return None, None
+    memo_key = (symbol, tf, cols["ts"][-1].item(), n)
+    hit = IND_CACHE.get(memo_key)
+    if hit is not None:
+        IND_CACHE.move_to_end(memo_key)
+        return hit
+    # Column arrays wrap straight into a frame; no per-row dict walk
+    df = pd.DataFrame(
+        {c: cols[c] for c in BAR_COLUMNS},
+        index=pd.DatetimeIndex(cols["ts"], tz=timezone.utc, name="ts"),
+    )
     df_ind = compute_indicators(df)
     sig = generate_signal(df_ind)
+    IND_CACHE[memo_key] = (df_ind, sig)
+    if len(IND_CACHE) > IND_CACHE_SIZE:
+        IND_CACHE.popitem(last=False)
+    return df_ind, sig
+
+def compute_and_emit(symbol: str, tf: str):
+    df_ind, sig = get_indicators_cached(symbol, tf)
+    if df_ind is None:
+        return
 
     strength = classify_strength(sig["trend"], sig["confidence"])
     payload = {
@@ -206,17 +294,80 @@ def compute_and_emit(symbol: str, tf: str):
     socketio.emit("signal", payload, namespace="/ws", broadcast=True)
     log.info(f"[{symbol} {tf}] {strength} ({sig['trend']}) conf={sig['confidence']:.2f}")
 
+# Remembers whether the API tier serves an interval directly, so unsupported
+# timeframes skip straight to the shared 1min fallback on later polls.
+TIER_SUPPORTS: Dict[str, bool] = {}
+
+# Fetches are I/O-bound; run them concurrently and keep cache/DB/emit serial.
+_FETCH_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("FETCH_WORKERS", "8")))
+
+# Overlap guard: if a poll outlasts POLL_SECONDS, the next cycle is dropped
+# instead of stacking concurrent polls against the API and DB.
+_POLL_LOCK = threading.Lock()
+
+# Wall-clock time of the last successful fetch per (symbol, tf); a timeframe
+# isn't re-fetched until half a bar interval has passed (no new bar possible).
+_LAST_FETCH: Dict[Tuple[str, str], float] = {}
+
+def poll_limit(tf: str) -> int:
+    # Use larger limit for high TF to stabilize indicators
+    return 400 if tf.endswith("hour") else 300
+
 def poll_symbols():
-    for symbol in DEFAULT_SYMBOLS:
-        for tf in TIMEFRAMES:
-            # Use larger limit for high TF to stabilize indicators
-            base_limit = 400 if tf.endswith("hour") else 300
-            df = marketstack_intraday(symbol, interval=tf, limit=base_limit)
+    if not _POLL_LOCK.acquire(blocking=False):
+        log.warning("previous poll still running; skipping this cycle")
+        return
+    try:
+        _poll_symbols()
+    finally:
+        _POLL_LOCK.release()
+
+def _poll_symbols():
+    now = time.time()
+    due = [
+        (symbol, tf)
+        for symbol in DEFAULT_SYMBOLS
+        for tf in TIMEFRAMES
+        if now - _LAST_FETCH.get((symbol, tf), 0.0) >= timeframe_minutes(tf) * 30
+    ]
+
+    # Stage 1: exact-interval fetches in parallel for intervals the tier serves
+    futures = {
+        (symbol, tf): _FETCH_POOL.submit(marketstack_intraday_api, symbol, tf, poll_limit(tf))
+        for symbol, tf in due
+        if TIER_SUPPORTS.get(cache_key(symbol, tf), True)
+    }
+    results = {k: f.result() for k, f in futures.items()}
+    for (symbol, tf), df in results.items():
+        # Only a successful-but-empty response proves the tier rejects this
+        # interval; a transport failure (None) says nothing, so don't demote.
+        if df is not None:
+            TIER_SUPPORTS[cache_key(symbol, tf)] = not df.empty
+
+    # Stage 2: one deep 1min fetch per symbol that needs the resample fallback
+    futures_1m = {
+        symbol: _FETCH_POOL.submit(marketstack_intraday_api, symbol, "1min", 5000)
+        for symbol in {
+            s for s, tf in due if results.get((s, tf)) is None or results[(s, tf)].empty
+        }
+    }
+    fallback_1m = {symbol: f.result() for symbol, f in futures_1m.items()}
+
+    # Stage 3: upsert/persist/emit serially — they touch shared cache and DB state
+    for symbol, tf in due:
+        df = results.get((symbol, tf))
+        if df is None or df.empty:
+            df_1m = fallback_1m.get(symbol)
+            if df_1m is None or df_1m.empty:
+                continue
+            df = df_1m if tf == "1min" else resample_ohlcv(df_1m, tf)
+            df = df.tail(poll_limit(tf))
             if df.empty:
                 continue
-            upsert_cache(cache_key(symbol, tf), df)
-            persist_snapshots(symbol, tf, df)
-            compute_and_emit(symbol, tf)
+        _LAST_FETCH[(symbol, tf)] = now
+        upsert_cache(cache_key(symbol, tf), df)
+        persist_snapshots(symbol, tf, df)
+        compute_and_emit(symbol, tf)
             
 def safe_float(x):
     try:
@@ -235,18 +386,32 @@ def build_indicators_payload(df_ind: pd.DataFrame, limit: int = 150, fields: Opt
     cols = fields or default_fields
     # Keep only existing columns
     cols = [c for c in cols if c in df_ind.columns]
-    slim = df_ind[cols].tail(limit).copy()
-    idx = slim.index.to_pydatetime()
-    out = {
-        "ts": [t.replace(tzinfo=timezone.utc).isoformat() for t in idx]
-    }
+    slim = df_ind[cols].tail(limit)
+    idx = slim.index
+    if idx.tz is None:
+        idx = idx.tz_localize(timezone.utc)
+    out = {"ts": idx.map(pd.Timestamp.isoformat).tolist()}
     for c in cols:
-        out[c] = [safe_float(v) for v in slim[c].tolist()]
+        arr = slim[c].to_numpy(dtype="float64")
+        vals = arr.tolist()
+        # Mask NaN/Inf in bulk; only the offending entries get touched
+        bad = np.flatnonzero(~np.isfinite(arr))
+        for i in bad:
+            vals[i] = None
+        out[c] = vals
     return out
 
 # ---------------- Scheduler ----------------
 scheduler = BackgroundScheduler(daemon=True)
-scheduler.add_job(poll_symbols, "interval", seconds=POLL_SECONDS, id="poll_job")
+scheduler.add_job(
+    poll_symbols,
+    "interval",
+    seconds=POLL_SECONDS,
+    id="poll_job",
+    max_instances=1,
+    coalesce=True,
+    misfire_grace_time=POLL_SECONDS,
+)
 scheduler.start()
 
 # ---------------- REST APIs ----------------
@@ -264,7 +429,7 @@ def snapshots():
     tf = request.args.get("tf", TIMEFRAMES[-1])  # default last = 1min
     limit = int(request.args.get("limit", "200"))
     key = cache_key(symbol, tf)
-    bars = CACHE.get(key, [])[-limit:]
+    bars = cache_bars(key, limit)
     if bars:
         return jsonify({"symbol": symbol, "timeframe": tf, "bars": bars})
     # Fallback: DB
@@ -296,15 +461,9 @@ def snapshots():
 def api_signal():
     symbol = request.args.get("symbol", DEFAULT_SYMBOLS[0]).upper()
     tf = request.args.get("tf", TIMEFRAMES[-1])  # default 1min
-    key = cache_key(symbol, tf)
-    bars = CACHE.get(key, [])
-    if len(bars) < 60:
+    df_ind, sig = get_indicators_cached(symbol, tf)
+    if df_ind is None:
         return jsonify({"error": "insufficient data"}), 425
-    df = pd.DataFrame(bars)
-    df["ts"] = pd.to_datetime(df["ts"], utc=True)
-    df.set_index("ts", inplace=True)
-    df_ind = compute_indicators(df)
-    sig = generate_signal(df_ind)
     strength = classify_strength(sig["trend"], sig["confidence"])
     return jsonify(
         {
@@ -342,17 +501,9 @@ def diagnostics():
     fields_param = request.args.get("fields")
     field_list = [f.strip() for f in fields_param.split(",")] if fields_param else None
 
-    key = cache_key(symbol, tf)
-    bars = CACHE.get(key, [])
-    if len(bars) < 60:
+    df_ind, sig = get_indicators_cached(symbol, tf)
+    if df_ind is None:
         return jsonify({"error": "insufficient data"}), 425
-
-    df = pd.DataFrame(bars)
-    df["ts"] = pd.to_datetime(df["ts"], utc=True)
-    df.set_index("ts", inplace=True)
-
-    df_ind = compute_indicators(df)
-    sig = generate_signal(df_ind)
     strength = classify_strength(sig["trend"], sig["confidence"])
 
     indicators = build_indicators_payload(df_ind, limit=limit, fields=field_list)
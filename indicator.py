@@ -1,26 +1,132 @@
 # indicators.py
 import pandas as pd
 import numpy as np
+import bottleneck as bn
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba is optional; bottleneck/pandas paths cover its absence
+    HAS_NUMBA = False
+
+def _as_float(series: pd.Series) -> np.ndarray:
+    """Underlying ndarray, preserving float32/float64; non-float dtypes become float64."""
+    arr = series.to_numpy()
+    if not np.issubdtype(arr.dtype, np.floating):
+        arr = arr.astype(np.float64)
+    return arr
+
+def _move_mean(arr: np.ndarray, window: int) -> np.ndarray:
+    # bottleneck raises when window > len(arr); pandas returns all-NaN
+    if arr.shape[0] < window:
+        return np.full(arr.shape[0], np.nan)
+    return bn.move_mean(arr, window=window, min_count=window)
+
+def _move_std(arr: np.ndarray, window: int) -> np.ndarray:
+    if arr.shape[0] < window:
+        return np.full(arr.shape[0], np.nan)
+    # ddof=1 to match pandas' rolling std default
+    return bn.move_std(arr, window=window, min_count=window, ddof=1)
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def ema_nb(close: np.ndarray, span: int) -> np.ndarray:
+        n = close.shape[0]
+        out = np.empty(n)
+        if n == 0:
+            return out
+        alpha = 2.0 / (span + 1.0)
+        out[0] = close[0]
+        for i in range(1, n):
+            out[i] = alpha * close[i] + (1.0 - alpha) * out[i - 1]
+        return out
+
+    @njit(cache=True)
+    def rsi_nb(close: np.ndarray, period: int) -> np.ndarray:
+        """Wilder RSI in a single pass: avg = (prev * (n - 1) + x) / n."""
+        n = close.shape[0]
+        out = np.full(n, np.nan)
+        if n <= period:
+            return out
+        avg_gain = 0.0
+        avg_loss = 0.0
+        for i in range(1, period + 1):
+            d = close[i] - close[i - 1]
+            if d > 0.0:
+                avg_gain += d
+            else:
+                avg_loss -= d
+        avg_gain /= period
+        avg_loss /= period
+        for i in range(period, n):
+            if i > period:
+                d = close[i] - close[i - 1]
+                gain = d if d > 0.0 else 0.0
+                loss = -d if d < 0.0 else 0.0
+                avg_gain = (avg_gain * (period - 1) + gain) / period
+                avg_loss = (avg_loss * (period - 1) + loss) / period
+            if avg_loss == 0.0:
+                out[i] = 100.0
+            else:
+                out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return out
+
+def _rsi_fallback(close: np.ndarray, period: int) -> np.ndarray:
+    """Wilder RSI without numba, matching rsi_nb: seed with the simple mean of
+    the first `period` diffs, then ewm(alpha=1/period, adjust=False) continues
+    the (prev * (n - 1) + x) / n recursion."""
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+    d = np.diff(close.astype(np.float64))
+    gains = np.clip(d, 0.0, None)
+    losses = np.clip(-d, 0.0, None)
+
+    def _wilder(x: np.ndarray) -> np.ndarray:
+        seeded = np.concatenate(([x[:period].mean()], x[period:]))
+        return pd.Series(seeded).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+
+    avg_gain = _wilder(gains)
+    avg_loss = _wilder(losses)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    out[period:] = np.where(avg_loss == 0.0, 100.0, rsi)
+    return out
+
+def _ema(close: np.ndarray, span: int) -> np.ndarray:
+    if HAS_NUMBA:
+        return ema_nb(close, span)
+    return pd.Series(close).ewm(span=span, adjust=False).mean().to_numpy()
+
+def _rsi(close: np.ndarray, period: int) -> np.ndarray:
+    if HAS_NUMBA:
+        return rsi_nb(close, period)
+    return _rsi_fallback(close, period)
 
 def SMA(series: pd.Series, window: int) -> pd.Series:
-    return series.rolling(window=window, min_periods=window).mean()
+    return pd.Series(_move_mean(_as_float(series), window), index=series.index)
 
 def EMA(series: pd.Series, span: int) -> pd.Series:
-    return series.ewm(span=span, adjust=False).mean()
+    return pd.Series(_ema(_as_float(series), span), index=series.index)
 
 def RSI(series: pd.Series, period: int = 14) -> pd.Series:
-    delta = series.diff()
-    gains = delta.clip(lower=0.0)
-    losses = -delta.clip(upper=0.0)
-    roll_up = gains.rolling(period).mean()
-    roll_down = losses.rolling(period).mean().replace(0, np.nan)
-    rs = roll_up / roll_down
-    rsi = 100 - (100 / (1 + rs))
+    rsi = pd.Series(_rsi(_as_float(series), period), index=series.index)
     return rsi.bfill()
 
-def MACD(series: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
-    ema_fast = EMA(series, fast)
-    ema_slow = EMA(series, slow)
+def MACD(
+    series: pd.Series,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+    ema_fast: pd.Series = None,
+    ema_slow: pd.Series = None,
+):
+    # Callers that already hold the EMAs can pass them in to skip recomputing
+    if ema_fast is None:
+        ema_fast = EMA(series, fast)
+    if ema_slow is None:
+        ema_slow = EMA(series, slow)
     macd = ema_fast - ema_slow
     signal_line = EMA(macd, signal)
     hist = macd - signal_line
@@ -28,27 +134,39 @@ def MACD(series: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
 
 def Bollinger(series: pd.Series, window: int = 20, num_std: float = 2.0):
     ma = SMA(series, window)
-    std = series.rolling(window=window, min_periods=window).std()
+    std = pd.Series(_move_std(_as_float(series), window), index=series.index)
     upper = ma + num_std * std
     lower = ma - num_std * std
     return ma, upper, lower
 
 def ATR(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-    prev_close = close.shift(1)
-    tr = pd.concat(
-        [(high - low), (high - prev_close).abs(), (low - prev_close).abs()],
-        axis=1,
-    ).max(axis=1)
-    return tr.rolling(window=period, min_periods=period).mean()
+    h = high.to_numpy(dtype=np.float64)
+    l = low.to_numpy(dtype=np.float64)
+    c = close.to_numpy(dtype=np.float64)
+    prev_c = np.empty_like(c)
+    prev_c[0] = np.nan
+    prev_c[1:] = c[:-1]
+    tr = np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
+    # First TR is NaN (no prev close); pandas' max skipped NaN, so fall back to high-low there.
+    if tr.shape[0] > 0:
+        tr[0] = h[0] - l[0]
+    return pd.Series(_move_mean(tr, period), index=close.index)
 
 def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    out["sma20"] = SMA(out["close"], 20)
-    out["sma50"] = SMA(out["close"], 50)
-    out["ema12"] = EMA(out["close"], 12)
-    out["ema26"] = EMA(out["close"], 26)
-    out["rsi14"] = RSI(out["close"], 14)
-    macd, sig, hist = MACD(out["close"])
+    """Append indicator columns to df in place and return it."""
+    out = df
+    # float32 halves memory bandwidth through the rolling kernels; signal
+    # thresholds (RSI bands, MACD sign, band location) don't need doubles.
+    # volume stays float64 for resample sums.
+    for c in ("open", "high", "low", "close"):
+        out[c] = out[c].astype("float32")
+    close = out["close"].to_numpy()
+    out["sma20"] = _move_mean(close, 20)
+    out["sma50"] = _move_mean(close, 50)
+    out["ema12"] = _ema(close, 12)
+    out["ema26"] = _ema(close, 26)
+    out["rsi14"] = pd.Series(_rsi(close, 14), index=out.index).bfill()
+    macd, sig, hist = MACD(out["close"], ema_fast=out["ema12"], ema_slow=out["ema26"])
     out["macd"] = macd
     out["macd_signal"] = sig
     out["macd_hist"] = hist
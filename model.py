@@ -1,6 +1,6 @@
 # models.py
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint
 
 Base = declarative_base()
 
@@ -18,4 +18,5 @@ class Snapshot(Base):
 
     __table_args__ = (
         Index("ix_symbol_tf_ts", "symbol", "timeframe", "ts"),
+        UniqueConstraint("symbol", "timeframe", "ts", name="uq_symbol_tf_ts"),
     )
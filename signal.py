@@ -3,57 +3,76 @@ from typing import Dict, Any
 import numpy as np
 import pandas as pd
 
-def _normalize(value, lo, hi):
-    if not np.isfinite(hi) or not np.isfinite(lo) or hi == lo:
-        return 0.5
-    return float((value - lo) / (hi - lo))
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba is optional; the plain-Python core is used without it
+    HAS_NUMBA = False
 
-def generate_signal(df: pd.DataFrame) -> Dict[str, Any]:
-    row = df.iloc[-1]
-    trend_up = row["ema12"] > row["ema26"]
-    rsi = float(row["rsi14"])
-    macd_hist = float(row["macd_hist"]) if np.isfinite(row["macd_hist"]) else 0.0
-    price = float(row["close"])
-    atr = float(row["atr14"]) if np.isfinite(row["atr14"]) else 0.0
-    bb_up = float(row["bb_up"]) if np.isfinite(row["bb_up"]) else np.nan
-    bb_lo = float(row["bb_lo"]) if np.isfinite(row["bb_lo"]) else np.nan
+_SIGNAL_FIELDS = ["close", "ema12", "ema26", "rsi14", "macd_hist", "atr14", "bb_up", "bb_lo"]
+
+def _signal_core(close, ema12, ema26, rsi, macd_hist, atr, bb_up, bb_lo):
+    """Scalar signal math on plain floats; returns
+    (trend_code, confidence, entry, stop_loss, take_profit, price_loc, macd_hist, atr).
+    trend_code: 1 = Bullish, -1 = Bearish, 0 = Sideways."""
+    if not np.isfinite(macd_hist):
+        macd_hist = 0.0
+    if not np.isfinite(atr):
+        atr = 0.0
 
-    s_trend = 1.0 if trend_up else 0.0
-    s_rsi = 1.0 if 50 < rsi < 70 else (0.5 if 30 <= rsi <= 50 else 0.0)
-    s_macd = 1.0 if macd_hist > 0 else 0.0
-    price_loc = _normalize(price, bb_lo, bb_up)
+    s_trend = 1.0 if ema12 > ema26 else 0.0
+    if 50.0 < rsi < 70.0:
+        s_rsi = 1.0
+    elif 30.0 <= rsi <= 50.0:
+        s_rsi = 0.5
+    else:
+        s_rsi = 0.0
+    s_macd = 1.0 if macd_hist > 0.0 else 0.0
+    if not np.isfinite(bb_up) or not np.isfinite(bb_lo) or bb_up == bb_lo:
+        price_loc = 0.5
+    else:
+        price_loc = (close - bb_lo) / (bb_up - bb_lo)
     s_boll = 1.0 - abs(0.5 - price_loc) * 2  # favor mid-band
 
-    weights = {"trend": 0.35, "rsi": 0.2, "macd": 0.25, "boll": 0.2}
-    confidence = (
-        weights["trend"] * s_trend
-        + weights["rsi"] * s_rsi
-        + weights["macd"] * s_macd
-        + weights["boll"] * s_boll
-    )
+    confidence = 0.35 * s_trend + 0.2 * s_rsi + 0.25 * s_macd + 0.2 * s_boll
+
+    if s_trend >= 0.5 and (s_macd >= 0.5 or rsi > 50.0):
+        trend_code = 1
+    elif s_trend < 0.5 and (s_macd < 0.5 or rsi < 50.0):
+        trend_code = -1
+    else:
+        trend_code = 0
 
-    if s_trend >= 0.5 and (s_macd >= 0.5 or rsi > 50):
-        trend = "Bullish"
-    elif not s_trend and (s_macd < 0.5 or rsi < 50):
-        trend = "Bearish"
+    entry = close
+    if trend_code == 1:
+        stop_loss = entry - 1.5 * atr
+        take_profit = entry + 3.0 * atr
     else:
-        trend = "Sideways"
+        stop_loss = entry + 1.5 * atr
+        take_profit = entry - 3.0 * atr
+
+    return trend_code, confidence, entry, stop_loss, take_profit, price_loc, macd_hist, atr
+
+if HAS_NUMBA:
+    _signal_core = njit(cache=True)(_signal_core)
 
-    entry = float(price)
-    stop_loss = entry - 1.5 * atr if trend == "Bullish" else entry + 1.5 * atr
-    take_profit = entry + 3.0 * atr if trend == "Bullish" else entry - 3.0 * atr
+_TREND_LABELS = {1: "Bullish", -1: "Bearish", 0: "Sideways"}
+
+def generate_signal(df: pd.DataFrame) -> Dict[str, Any]:
+    vals = df[_SIGNAL_FIELDS].iloc[-1].to_numpy(dtype=np.float64)
+    trend_code, confidence, entry, stop_loss, take_profit, price_loc, macd_hist, atr = _signal_core(*vals)
 
     explain = {
-        "trend_up": bool(trend_up),
-        "rsi": rsi,
-        "macd_hist": macd_hist,
+        "trend_up": bool(vals[1] > vals[2]),
+        "rsi": float(vals[3]),
+        "macd_hist": float(macd_hist),
         "price_loc_bb": float(price_loc),
-        "atr": atr,
+        "atr": float(atr),
     }
 
     return {
-        "trend": trend,
-        "entry": entry,
+        "trend": _TREND_LABELS[int(trend_code)],
+        "entry": float(entry),
         "stop_loss": float(stop_loss),
         "take_profit": float(take_profit),
         "confidence": float(confidence),
@@ -65,7 +65,7 @@ export default function RealTimeChart() {
       ]);
     });
 
-    socket.on('new_candle', (c) => {
+    const applyCandle = (c) => {
       const d = dataRef.current;
       const lastIdx = d.x.length - 1;
       if (lastIdx >= 0 && c.time === d.x[lastIdx]) {
@@ -97,6 +97,10 @@ export default function RealTimeChart() {
         );
         Plotly.update(divRef.current, { x: [d.x], y: [ma10] }, {}, [1]);
       }
+    };
+
+    socket.on('new_candles', (batch) => {
+      batch.forEach(applyCandle);
     });
 
     return () => socket.close();
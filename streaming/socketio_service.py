@@ -1,8 +1,11 @@
 import os
+import select
 import time
 import threading
 from datetime import datetime
 import pandas as pd
+import psycopg2
+import psycopg2.extensions
 from sqlalchemy import create_engine, text
 from flask_socketio import SocketIO, emit
 
@@ -14,6 +17,9 @@ DB_NAME = os.getenv("DB_NAME", "trading")
 TABLE = os.getenv("OHLC_TABLE", "ohlc_data")
 POLL_SECONDS = float(os.getenv("POLL_SECONDS", "2"))
 INIT_LIMIT = int(os.getenv("INIT_LIMIT", "200"))
+NOTIFY_CHANNEL = os.getenv("NOTIFY_CHANNEL", "new_candle")
+NOTIFY_TIMEOUT = float(os.getenv("NOTIFY_TIMEOUT", "30"))  # safety-net drain interval
+LISTEN_RETRY_MAX = float(os.getenv("LISTEN_RETRY_MAX", "300"))  # cap between LISTEN reconnects
 
 engine = create_engine(
     f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
@@ -60,37 +66,8 @@ def _fetch_new_since(ts):
         )
     return df
 
-def polling_worker():
-    global _last_ts
-    _init_last_ts()
-    while True:
-        try:
-            with _ts_lock:
-                ts = _last_ts
-            if ts is None:
-                time.sleep(POLL_SECONDS)
-                continue
-            df = _fetch_new_since(ts)
-            for _, row in df.iterrows():
-                payload = {
-                    "time": row["time"].isoformat() if isinstance(row["time"], datetime) else str(row["time"]),
-                    "open": float(row["open"]),
-                    "high": float(row["high"]),
-                    "low": float(row["low"]),
-                    "close": float(row["close"]),
-                    "volume": float(row["volume"]),
-                }
-                with _ts_lock:
-                    _last_ts = row["time"]
-                socketio.emit("new_candle", payload, namespace="/prices")
-        except Exception as e:
-            print(f"[polling_worker] error: {e}")
-        time.sleep(POLL_SECONDS)
-
-@socketio.on("connect", namespace="/prices")
-def on_connect():
-    df = _fetch_recent(INIT_LIMIT)
-    candles = [
+def _df_to_candles(df):
+    return [
         {
             "time": (t.isoformat() if isinstance(t, datetime) else str(t)),
             "open": float(o),
@@ -101,7 +78,89 @@ def on_connect():
         }
         for t, o, h, l, c, v in df[["time", "open", "high", "low", "close", "volume"]].itertuples(index=False, name=None)
     ]
-    emit("init_candles", candles)
+
+def _drain_and_emit():
+    global _last_ts
+    with _ts_lock:
+        ts = _last_ts
+    if ts is None:
+        # Table was empty at startup; check again
+        _init_last_ts()
+        return
+    df = _fetch_new_since(ts)
+    if not df.empty:
+        candles = _df_to_candles(df)
+        with _ts_lock:
+            _last_ts = df["time"].iloc[-1]
+        socketio.emit("new_candles", candles, namespace="/prices")
+
+def _setup_notify():
+    """Install a statement-level trigger that NOTIFYs when new rows land."""
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {TABLE}_notify() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('{NOTIFY_CHANNEL}', '');
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {TABLE}_notify_trg ON {TABLE}"))
+        conn.execute(text(f"""
+            CREATE TRIGGER {TABLE}_notify_trg
+            AFTER INSERT ON {TABLE}
+            FOR EACH STATEMENT EXECUTE FUNCTION {TABLE}_notify()
+        """))
+
+def _listen_loop():
+    conn = psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT
+    )
+    try:
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        while True:
+            # Block until NOTIFY; the timeout drains anyway in case one was missed
+            if select.select([conn], [], [], NOTIFY_TIMEOUT) != ([], [], []):
+                conn.poll()
+                conn.notifies.clear()
+            try:
+                # A failed drain (e.g. a query hiccup) shouldn't tear down the
+                # LISTEN connection; the next notify/timeout retries it.
+                _drain_and_emit()
+            except Exception as e:
+                print(f"[listen_loop] drain error: {e}")
+    finally:
+        conn.close()
+
+def polling_worker():
+    _init_last_ts()
+    backoff = POLL_SECONDS
+    while True:
+        started = time.monotonic()
+        try:
+            _setup_notify()
+            _listen_loop()
+        except Exception as e:
+            print(f"[polling_worker] LISTEN/NOTIFY down, polling while reconnecting: {e}")
+        # A session that outlived the current backoff was healthy; start the
+        # reconnect schedule over instead of compounding old failures.
+        if time.monotonic() - started > backoff:
+            backoff = POLL_SECONDS
+        # Poll as the stopgap until the next LISTEN attempt, then back off.
+        deadline = time.monotonic() + backoff
+        while time.monotonic() < deadline:
+            try:
+                _drain_and_emit()
+            except Exception as e:
+                print(f"[polling_worker] error: {e}")
+            time.sleep(POLL_SECONDS)
+        backoff = min(backoff * 2, LISTEN_RETRY_MAX)
+
+@socketio.on("connect", namespace="/prices")
+def on_connect():
+    emit("init_candles", _df_to_candles(_fetch_recent(INIT_LIMIT)))
 
 def init_socketio(app):
     socketio.init_app(app)
@@ -33,8 +33,12 @@ prices.on('init_candles', (candles) => {
     console.log('[PRICES] last candle:', { time: c.time, o: c.open, h: c.high, l: c.low, c: c.close });
   }
 });
-prices.on('new_candle', (c) => {
-  console.log('[PRICES] new_candle:', { time: c.time, o: c.open, h: c.high, l: c.low, c: c.close });
+prices.on('new_candles', (batch) => {
+  console.log(`[PRICES] new_candles: ${Array.isArray(batch) ? batch.length : 'N/A'} bars`);
+  if (Array.isArray(batch) && batch.length) {
+    const c = batch[batch.length - 1];
+    console.log('[PRICES] latest:', { time: c.time, o: c.open, h: c.high, l: c.low, c: c.close });
+  }
 });
 prices.on('disconnect', (reason) => {
   console.log('[PRICES] disconnected:', reason);
@@ -2,7 +2,7 @@ import pandas as pd
 import numpy as np
 import pytest
 
-from indicator import compute_indicators
+from indicator import compute_indicators, SMA, EMA, RSI
 
 def test_compute_indicators_returns_expected_columns():
     # Create dummy OHLC data
@@ -22,3 +22,45 @@ def test_compute_indicators_returns_expected_columns():
     # Example: check that a known indicator column exists
     assert any(col.lower().startswith("sma") for col in result.columns), \
         f"Expected at least one SMA column, got {result.columns.tolist()}"
+
+def _random_walk(n=200, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.cumsum(rng.normal(0, 1, n)) + 100.0)
+
+def test_sma_matches_pandas_rolling_mean():
+    s = _random_walk()
+    expected = s.rolling(20, min_periods=20).mean()
+    pd.testing.assert_series_equal(SMA(s, 20), expected, check_names=False)
+
+def test_ema_matches_pandas_ewm():
+    s = _random_walk()
+    expected = s.ewm(span=12, adjust=False).mean()
+    np.testing.assert_allclose(EMA(s, 12).to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+def test_rsi_is_wilder_smoothed():
+    # Pin the Wilder formula: seed with the simple mean of the first `period`
+    # diffs, then avg = (prev * (period - 1) + x) / period, which is
+    # ewm(alpha=1/period, adjust=False) over the clipped diffs.
+    period = 14
+    s = _random_walk()
+    d = np.diff(s.to_numpy())
+    gains = np.clip(d, 0.0, None)
+    losses = np.clip(-d, 0.0, None)
+
+    def wilder(x):
+        seeded = np.concatenate(([x[:period].mean()], x[period:]))
+        return pd.Series(seeded).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+
+    avg_gain = wilder(gains)
+    avg_loss = wilder(losses)
+    expected = np.empty(len(s))
+    expected[period:] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    expected[:period] = expected[period]  # RSI() backfills the warm-up
+
+    result = RSI(s, period)
+    np.testing.assert_allclose(result.to_numpy(), expected, rtol=1e-9)
+    assert ((result >= 0.0) & (result <= 100.0)).all()
+
+def test_rsi_saturates_at_100_without_losses():
+    s = pd.Series(np.arange(100, dtype=float))
+    assert (RSI(s, 14) == 100.0).all()